@@ -0,0 +1,197 @@
+"""
+OnboardMate agent and the other objects kept alive across Streamlit reruns.
+
+Streamlit re-executes onboardmate.py into a fresh module on every rerun, so classes
+whose instances are cached with st.cache_resource, or whose exceptions are caught
+across reruns, are defined here, where they are created once per process.
+"""
+import asyncio
+import os
+import string
+import threading
+import time
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+class PlanGenerationError(Exception):
+    """Raised when Gemini stops a response early (e.g. recitation, safety or a blocked prompt)."""
+
+# Knowledge answers are reused for an hour, up to a fixed number of queries
+KNOWLEDGE_CACHE_TTL = 3600
+KNOWLEDGE_CACHE_MAX_ENTRIES = 512
+EMBEDDING_MODEL = "models/text-embedding-004"
+BATCH_CONCURRENCY = 8
+
+# Onboarding plan prompt, built once at import instead of on every call
+_PROMPT_TEMPLATE = string.Template("""Create a personalized onboarding plan for a new hire with the following details:
+
+        *   **Name:** $name
+        *   **Role:** $role
+        *   **Department:** $department
+        *   **Start Date:** $start_date
+        *   **Previous Experience:** $previous_experience
+        *   **Onboarding Goals:** $goals
+
+        The plan should include:
+        - A checklist of tasks to be completed
+        - A schedule of onboarding sessions
+        - Links to relevant training materials
+        - Key contacts and resources
+
+        Write the onboarding plan in a clear and concise format.
+        """)
+
+# Finish reasons of a response that completed normally
+_NORMAL_FINISH_REASONS = frozenset({"STOP", "MAX_TOKENS", "FINISH_REASON_UNSPECIFIED"})
+
+def _stream_text(response):
+    """
+    Yield the text of each streamed chunk, raising PlanGenerationError if generation was stopped.
+    """
+    for chunk in response:
+        if not chunk.candidates:
+            if chunk.prompt_feedback.block_reason:
+                print("PROMPT BLOCKED")
+                raise PlanGenerationError("BLOCKED")
+            continue
+        candidate = chunk.candidates[0]
+        if candidate.finish_reason.name not in _NORMAL_FINISH_REASONS:
+            print(f"{candidate.finish_reason.name} STOPPED")
+            raise PlanGenerationError(candidate.finish_reason.name)
+        # Streams often end with an empty chunk that only carries the finish reason
+        if candidate.content.parts:
+            yield chunk.text
+
+# Gemini API key, once found
+_api_key = ""
+
+def get_api_key():
+    """
+    Look up the Gemini API key, preferring Streamlit secrets over the environment.
+    A found key is kept for the life of the process; a missing one is looked up again on the next call.
+    """
+    global _api_key
+    if not _api_key:
+        try:
+            api_key = st.secrets.get("GEMINI_API_KEY")
+        except (FileNotFoundError, StreamlitAPIException):
+            api_key = None  # No secrets.toml
+        _api_key = api_key or os.environ.get("GEMINI_API_KEY", "")
+    return _api_key
+
+# API key genai has been configured with, so cached agents don't reconfigure it
+_configured_api_key = None
+
+class OnboardMateAgent:
+    def __init__(self, api_key, model_name="gemini-2.0-flash-exp"):
+        import google.generativeai as genai
+
+        # Configure API once per key
+        global _configured_api_key
+        if _configured_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+
+        # Generation configuration
+        self.generation_config = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "top_k": 40,
+            "max_output_tokens": 8192,
+            "response_mime_type": "text/plain",
+        }
+
+        # Create the model with system instruction
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=self.generation_config,
+        )
+
+    def generate_onboarding_plan(self, employee_data):
+        """
+        Generate a personalized onboarding plan for a new hire, yielding text as it streams in.
+        """
+        final_prompt = _PROMPT_TEMPLATE.substitute(employee_data)
+
+        response = self.model.generate_content(final_prompt, stream=True)
+        yield from _stream_text(response)
+
+    def _generate_plan_text(self, employee_data):
+        """
+        Generate a complete onboarding plan as one string, returning None if generation failed.
+        """
+        try:
+            return "".join(self.generate_onboarding_plan(employee_data))
+        except PlanGenerationError:
+            return None
+        except Exception as e:
+            # A failed hire (rate limit, network error) must not discard the rest of the batch
+            print(f"Error: {e}")
+            return None
+
+    async def _generate_async(self, employee_data, semaphore):
+        """
+        Generate one plan on a worker thread, holding a semaphore slot while the request is in flight.
+        """
+        async with semaphore:
+            return await asyncio.to_thread(self._generate_plan_text, employee_data)
+
+    async def generate_batch(self, employees, concurrency=BATCH_CONCURRENCY):
+        """
+        Generate onboarding plans for several new hires concurrently, in input order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(self._generate_async(employee_data, semaphore) for employee_data in employees))
+
+    def provide_knowledge_assistance(self, query):
+        """
+        Provide real-time knowledge assistance to new hires, streamed as it is generated.
+        """
+        response = self.model.generate_content(
+            f"Provide a detailed response to the following query from a new hire:\n\n{query}",
+            stream=True,
+        )
+        yield from _stream_text(response)
+
+    def embed_texts(self, texts):
+        """
+        Embed a list of texts in a single request, returning one vector per text.
+        """
+        import google.generativeai as genai
+
+        return genai.embed_content(model=EMBEDDING_MODEL, content=list(texts))["embedding"]
+
+class KnowledgeCache:
+    """
+    Exact-match store of knowledge answers, shared across sessions, expiring after a TTL and capped in size.
+    """
+    def __init__(self, ttl=KNOWLEDGE_CACHE_TTL, max_entries=KNOWLEDGE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._answers = {}  # {normalized query: (timestamp, answer)}, oldest first
+        self._lock = threading.Lock()
+
+    def get(self, query_norm):
+        """
+        Return the stored answer for the query, or None if there is none or it has expired.
+        """
+        with self._lock:
+            entry = self._answers.get(query_norm)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, query_norm, answer):
+        """
+        Store an answer, dropping expired entries and the oldest ones beyond max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._answers.pop(query_norm, None)
+            self._answers[query_norm] = (now, answer)
+            # Entries are kept in insertion order, so expired and overflowing ones are at the front
+            while self._answers:
+                oldest = next(iter(self._answers))
+                if now - self._answers[oldest][0] < self.ttl and len(self._answers) <= self.max_entries:
+                    break
+                del self._answers[oldest]
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+FAQ content for the Knowledge Assistance tab.
+
+Kept out of onboardmate.py, which Streamlit re-executes on every rerun, so the
+literals and the markdown/HTML built from them are created once per process.
+"""
+import html
+import types
+
+def normalize_query(query):
+    """
+    Normalize a knowledge query for exact-match caching.
+    """
+    return " ".join(query.lower().split())
+
+EXAMPLE_QUESTIONS = (
+    "Where can I find the project documentation?",
+    "What is the process for requesting time off?",
+    "How do I set up my email account?",
+    "Where can I find the employee handbook?",
+    "What are the core working hours?",
+    "How do I access the company's intranet?",
+)
+EXAMPLE_QUESTIONS_MD = "\n".join(f"- {question}" for question in EXAMPLE_QUESTIONS)
+
+FAQS = types.MappingProxyType({
+    "How do I set up my email account?": "You can set up your email account by following the instructions provided in the onboarding email. If you need further assistance, contact IT support.",
+    "What is the process for requesting time off?": "You can request time off by submitting a request through the HR portal. Make sure to get approval from your manager.",
+    "Where can I find the employee handbook?": "The employee handbook is available on the company's intranet under the 'Resources' section.",
+    "What are the core working hours?": "The core working hours are from 9 AM to 5 PM, Monday to Friday.",
+    "How do I access the company's intranet?": "You can access the intranet by logging in with your company credentials at intranet.company.com.",
+    "What is the dress code policy?": "The company follows a business casual dress code. Please refer to the employee handbook for more details.",
+    "How do I request IT support?": "You can request IT support by submitting a ticket through the IT support portal or by calling the IT helpdesk.",
+    "What are the key contacts in my department?": "You can find the key contacts in your department by checking the department directory on the intranet.",
+    "How do I enroll in benefits?": "You can enroll in benefits by logging into the HR portal and following the enrollment instructions.",
+    "What is the process for submitting expenses?": "You can submit expenses by filling out the expense report form available on the HR portal and submitting it for approval.",
+    "How do I access training materials?": "Training materials are available on the company's learning management system (LMS). You can access it through the intranet.",
+    "What is the company's policy on remote work?": "The company allows remote work for certain roles. Please check with your manager and refer to the remote work policy in the employee handbook.",
+    "How do I schedule a meeting room?": "You can schedule a meeting room by using the room booking system available on the intranet.",
+    "What are the company's core values?": "The company's core values are integrity, innovation, collaboration, and excellence.",
+    "How do I report a technical issue?": "You can report a technical issue by submitting a ticket through the IT support portal or by contacting the IT helpdesk.",
+    "What is the process for performance reviews?": "Performance reviews are conducted bi-annually. You will receive a notification from HR with instructions on how to prepare.",
+    "How do I update my personal information in the system?": "You can update your personal information by logging into the HR portal and navigating to the 'My Profile' section.",
+    "What are the company's social media guidelines?": "The company's social media guidelines are available in the employee handbook. Please review them before posting on social media.",
+    "How do I request business cards?": "You can request business cards by submitting a request through the HR portal. Make sure to include your design preferences.",
+})
+FAQ_ANSWERS_BY_QUERY = {normalize_query(question): answer for question, answer in FAQS.items()}
+# One markdown element for all FAQs instead of an expander per question
+FAQS_HTML = "".join(
+    f"<details><summary>{html.escape(question)}</summary><p>{html.escape(answer)}</p></details>"
+    for question, answer in FAQS.items()
+)
\ No newline at end of file
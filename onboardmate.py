@@ -1,74 +1,91 @@
+import asyncio
+import io
 import os
+import re
+import time
+import zipfile
 import streamlit as st
-import google.generativeai as genai
 from datetime import datetime
-import pandas as pd
-from fpdf import FPDF  # For PDF generation
-
-class OnboardMateAgent:
-    def __init__(self, api_key, model_name="gemini-2.0-flash-exp"):
-        # Configure API
-        genai.configure(api_key=api_key)
-
-        # Generation configuration
-        self.generation_config = {
-            "temperature": 0.7,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 8192,
-            "response_mime_type": "text/plain",
-        }
-
-        # Create the model with system instruction
-        self.model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=self.generation_config,
-        )
-
-    def generate_onboarding_plan(self, employee_data):
-        """
-        Generate a personalized onboarding plan for a new hire.
-        """
-        prompt_template = """Create a personalized onboarding plan for a new hire with the following details:
-
-        *   **Name:** {name}
-        *   **Role:** {role}
-        *   **Department:** {department}
-        *   **Start Date:** {start_date}
-        *   **Previous Experience:** {previous_experience}
-        *   **Onboarding Goals:** {goals}
-
-        The plan should include:
-        - A checklist of tasks to be completed
-        - A schedule of onboarding sessions
-        - Links to relevant training materials
-        - Key contacts and resources
-
-        Write the onboarding plan in a clear and concise format.
-        """
 
-        final_prompt = prompt_template.format(**employee_data)
+from agent import KnowledgeCache, OnboardMateAgent, PlanGenerationError, get_api_key
+from faqs import EXAMPLE_QUESTIONS_MD, FAQ_ANSWERS_BY_QUERY, FAQS, FAQS_HTML, normalize_query
 
-        chat = self.model.start_chat(history=[])  # Start new session
-        try:
-            response = chat.send_message(final_prompt)
-            if response.candidates and response.candidates[0].finish_reason == "RECITATION":
-                print("RECITATION STOPPED")
-                return None  # Indicate failure, you may want to retry here.
-            else:
-                return response.text
-        except genai.types.generation_types.StopCandidateException as e:
-            print(f"Error: {e}")
-            return None  # Indicate failure
+# pandas, pyarrow, numpy, xlsxwriter, fpdf and google.generativeai are imported
+# inside the functions that use them, so reruns that don't need them skip the import cost
 
-    def provide_knowledge_assistance(self, query):
-        """
-        Provide real-time knowledge assistance to new hires.
-        """
-        response = self.model.start_chat(history=[]).send_message(
-            f"Provide a detailed response to the following query from a new hire:\n\n{query}"
-        )
-        return response.text
+# FAQ answers are served when the query embedding is at least this similar to the FAQ question
+FAQ_MATCH_THRESHOLD = 0.88
+
+# Employee records are appended to a Parquet dataset; the workbook is only read
+# once to carry over records saved before the switch
+DATA_PATH = "onboarding_data.parquet"
+LEGACY_EXCEL_PATH = "onboarding_data.xlsx"
+
+# Columns a bulk onboarding CSV must provide, one row per new hire
+BATCH_COLUMNS = ("name", "role", "department", "start_date", "previous_experience", "goals")
+
+@st.cache_resource(show_spinner=False)
+def get_agent(api_key):
+    """
+    Return the OnboardMate agent for this API key, shared across reruns and sessions.
+    """
+    return OnboardMateAgent(api_key)
+
+@st.cache_resource(show_spinner=False)
+def _knowledge_cache():
+    """
+    Return the knowledge answer cache shared across reruns and sessions.
+    """
+    return KnowledgeCache()
+
+@st.cache_resource(show_spinner=False)
+def _faq_index(_agent):
+    """
+    Embed the FAQ questions once, returning (answers, (N, D) unit-norm float32 embeddings).
+    """
+    import numpy as np
+
+    questions = list(FAQS)
+    answers = [FAQS[question] for question in questions]
+    embeddings = np.ascontiguousarray(_agent.embed_texts(questions), dtype=np.float32)
+    # Normalize rows up front so a query's cosine scores are a single matrix-vector product
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return answers, embeddings
+
+def find_cached_answer(agent, query_norm):
+    """
+    Return a cached or FAQ answer for the query, or None if Gemini has to be asked.
+    """
+    cached_answer = _knowledge_cache().get(query_norm)
+    if cached_answer:
+        return cached_answer
+
+    if query_norm in FAQ_ANSWERS_BY_QUERY:
+        return FAQ_ANSWERS_BY_QUERY[query_norm]
+
+    import numpy as np
+
+    # Semantic matching is only an optimization, so an embedding failure is a cache miss
+    try:
+        answers, embeddings = _faq_index(agent)
+        query_embedding = np.asarray(agent.embed_texts([query_norm])[0], dtype=np.float32)
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+    # Cosine similarity of the query against every FAQ question in one matrix-vector product
+    query_embedding /= np.linalg.norm(query_embedding)
+    scores = embeddings @ query_embedding
+    best = int(scores.argmax())
+    if scores[best] >= FAQ_MATCH_THRESHOLD:
+        return answers[best]
+    return None
+
+def remember_answer(query_norm, answer):
+    """
+    Store a generated knowledge answer for exact-match reuse.
+    """
+    _knowledge_cache().put(query_norm, answer)
 
 def render_download_button(content, file_name, mime_type="text/plain"):
     """
@@ -81,34 +98,146 @@ def render_download_button(content, file_name, mime_type="text/plain"):
         mime=mime_type,
     )
 
-def save_to_excel(data, file_path="onboarding_data.xlsx"):
+def migrate_legacy_excel(dataset_path=DATA_PATH):
+    """
+    Seed the Parquet dataset from the old Excel file, if that has not happened yet.
+    """
+    if not os.path.exists(dataset_path) and os.path.exists(LEGACY_EXCEL_PATH):
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        legacy_df = pd.read_excel(LEGACY_EXCEL_PATH, dtype=str, keep_default_na=False)
+        pq.write_to_dataset(pa.Table.from_pandas(legacy_df, preserve_index=False), dataset_path, basename_template="0-{i}.parquet")
+
+@st.cache_resource(show_spinner=False)
+def _migrate_legacy_excel_once():
+    """
+    Run the legacy Excel migration once per process, so later reruns don't check for it again.
+    """
+    migrate_legacy_excel()
+
+def save_employee_data(data, dataset_path=DATA_PATH):
+    """
+    Append employee data to the Parquet dataset as a new file, without rewriting existing records.
+    """
+    save_employee_records([data], dataset_path)
+
+def save_employee_records(records, dataset_path=DATA_PATH):
     """
-    Save employee data to an Excel file.
+    Append several employee records to the Parquet dataset as a single new file.
     """
-    if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        new_df = pd.DataFrame([data])
-        df = pd.concat([df, new_df], ignore_index=True)
-    else:
-        df = pd.DataFrame([data])
-    
-    df.to_excel(file_path, index=False)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 
-def generate_pdf(content, file_name="onboarding_plan.pdf"):
+    migrate_legacy_excel(dataset_path)
+
+    # Timestamped file names keep records in insertion order when the dataset is read back
+    pq.write_to_dataset(pa.Table.from_pylist(records), dataset_path, basename_template=f"{time.time_ns()}-{{i}}.parquet")
+
+def _saved_mtime(dataset_path=DATA_PATH):
+    """
+    Return the modification time of the saved employee data, or None if nothing has been saved.
+    """
+    try:
+        return os.stat(dataset_path).st_mtime
+    except FileNotFoundError:
+        return None
+
+@st.cache_data(show_spinner=False)
+def _load_saved(dataset_path, mtime):
     """
-    Generate a PDF file from the onboarding plan content.
+    Load the saved employee data; mtime is part of the cache key so new records invalidate it.
     """
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
+    import pyarrow.parquet as pq
 
-    # Add content to the PDF
-    for line in content.split("\n"):
-        pdf.cell(200, 10, txt=line, ln=True)
+    return pq.read_table(dataset_path).to_pandas()
 
-    # Save the PDF
-    pdf.output(file_name)
-    return file_name
+def export_excel(df):
+    """
+    Render the saved employee data as an Excel workbook in memory.
+    """
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    # Constant-memory mode flushes each row as it is written instead of holding the sheet
+    workbook = xlsxwriter.Workbook(buffer, {"constant_memory": True})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, list(df.columns))
+    # xlsxwriter can't write NaN, so missing values become empty cells
+    for i, row in enumerate(df.fillna("").itertuples(index=False, name=None), start=1):
+        worksheet.write_row(i, 0, row)
+    workbook.close()
+    return buffer.getvalue()
+
+class PlanPDF:
+    """
+    Builds an onboarding plan PDF incrementally, one completed line at a time, as text streams in.
+    """
+    def __init__(self):
+        from fpdf import FPDF
+
+        self.pdf = FPDF()
+        self.pdf.add_page()
+        self.pdf.set_font("Arial", size=12)
+        self._tail = ""  # Text after the last newline, waiting for its line to complete
+
+    def write(self, text):
+        """
+        Add a chunk of text, rendering every line it completes.
+        """
+        lines = (self._tail + text).split("\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self._write_line(line)
+
+    def tee(self, chunks):
+        """
+        Feed streamed chunks into the PDF while passing them through, e.g. to st.write_stream.
+        """
+        for chunk in chunks:
+            self.write(chunk)
+            yield chunk
+
+    def output(self):
+        """
+        Flush the last line and return the PDF bytes.
+        """
+        if self._tail:
+            self._write_line(self._tail)
+            self._tail = ""
+
+        # Build the PDF in memory; fpdf returns a latin-1 str, fpdf2 a bytearray
+        output = self.pdf.output(dest="S")
+        return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+    def _write_line(self, line):
+        # multi_cell handles wrapping. The core fonts are latin-1 only, so anything
+        # outside it is replaced rather than failing. fpdf2 leaves x at the right
+        # margin after a multi_cell, so each line starts back at the left margin.
+        self.pdf.set_x(self.pdf.l_margin)
+        self.pdf.multi_cell(0, 10, txt=line.encode("latin-1", "replace").decode("latin-1"))
+
+def generate_pdf(content):
+    """
+    Generate a PDF from the onboarding plan content (a string or an iterable of text chunks) and return its bytes.
+    """
+    plan_pdf = PlanPDF()
+    for chunk in ([content] if isinstance(content, str) else content):
+        plan_pdf.write(chunk)
+    return plan_pdf.output()
+
+def build_plans_zip(employees, plans):
+    """
+    Bundle the generated onboarding plans into a zip of PDFs, skipping failed ones.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, (employee_data, plan) in enumerate(zip(employees, plans), start=1):
+            if plan:
+                safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", employee_data["name"]).strip("_") or "employee"
+                archive.writestr(f"{i:03d}_{safe_name}_onboarding_plan.pdf", generate_pdf(plan))
+    return buffer.getvalue()
 
 def main():
     # Set page configuration
@@ -122,16 +251,13 @@ def main():
     st.title("👤 OnboardMate - AI-Powered Employee Onboarding")
     st.markdown("Streamline and personalize the employee onboarding process with the help of AI.")
 
-    # Fetch API Key from environment variables
-    api_key = os.environ.get("GEMINI_API_KEY", "")
+    # Fetch API Key from Streamlit secrets or environment variables
+    api_key = get_api_key()
 
     if not api_key:
-        st.error("API key not found in environment variables! Set GEMINI_API_KEY.")
+        st.error("API key not found! Set GEMINI_API_KEY in .streamlit/secrets.toml or the environment.")
         return
 
-    # Initialize OnboardMate Agent
-    onboard_mate_agent = OnboardMateAgent(api_key)
-
     # Tabs for Onboarding Plan and Knowledge Assistance
     tab1, tab2 = st.tabs(["📋 Onboarding Plan", "📚 Knowledge Assistance"])
 
@@ -139,53 +265,120 @@ def main():
         st.subheader("📋 Onboarding Plan")
         st.markdown("Please provide the following details for the new hire:")
 
-        # Input fields for the new hire's details
-        name = st.text_input("Name", placeholder="e.g. AKELLA SRI DATTA SURYANARAYANA", key="onboard_name")
-        role = st.text_input("Role", placeholder="e.g. Software Engineer", key="onboard_role")
-        department = st.text_input("Department", placeholder="e.g. Engineering", key="onboard_department")
-        start_date = st.date_input("Start Date", key="onboard_start_date")
-        previous_experience = st.text_area("Previous Experience", placeholder="e.g. 5 years of experience in software development", key="onboard_experience")
-        goals = st.text_area("Onboarding Goals", placeholder="e.g. Get familiar with the codebase, understand the team's workflow", key="onboard_goals")
-
-        if st.button("Generate Onboarding Plan", key="btn_generate_plan"):
-            if any([name.strip(), role.strip(), department.strip(), start_date, previous_experience.strip(), goals.strip()]):
+        # Input fields for the new hire's details; the form only reruns the script on submit
+        with st.form("onboard_form"):
+            name = st.text_input("Name", placeholder="e.g. AKELLA SRI DATTA SURYANARAYANA", key="onboard_name")
+            role = st.text_input("Role", placeholder="e.g. Software Engineer", key="onboard_role")
+            department = st.text_input("Department", placeholder="e.g. Engineering", key="onboard_department")
+            start_date = st.date_input("Start Date", key="onboard_start_date")
+            previous_experience = st.text_area("Previous Experience", placeholder="e.g. 5 years of experience in software development", key="onboard_experience")
+            goals = st.text_area("Onboarding Goals", placeholder="e.g. Get familiar with the codebase, understand the team's workflow", key="onboard_goals")
+            submitted = st.form_submit_button("Generate Onboarding Plan")
+
+        # Results are rendered outside the form, since download buttons can't live inside one
+        if submitted:
+            # Validate locally before any request is made; every field is needed for a useful plan
+            required = [name, role, department, previous_experience, goals]
+            if start_date and all(field.strip() for field in required):
                 employee_data = {
                     "name": name,
                     "role": role,
                     "department": department,
-                    "start_date": start_date.strftime("%Y-%m-%d"),
+                    "start_date": start_date.isoformat(),
                     "previous_experience": previous_experience,
                     "goals": goals,
                 }
-                with st.spinner("Generating onboarding plan..."):
-                    onboarding_plan = onboard_mate_agent.generate_onboarding_plan(employee_data)
+                onboard_mate_agent = get_agent(api_key)
+                st.markdown("### Generated Onboarding Plan")
+                # The PDF is built from the same stream that is rendered, so it is ready when the last token arrives
+                plan_pdf = PlanPDF()
+                try:
+                    with st.spinner("Generating onboarding plan..."):
+                        onboarding_plan = st.write_stream(plan_pdf.tee(onboard_mate_agent.generate_onboarding_plan(employee_data)))
+                except PlanGenerationError:
+                    onboarding_plan = None
                 if onboarding_plan:
-                    st.markdown("### Generated Onboarding Plan")
-                    st.markdown(onboarding_plan, unsafe_allow_html=True)
-
-                    # Save employee data to Excel
-                    save_to_excel(employee_data)
-                    st.success("Employee details saved to Excel file.")
-
-                    # Generate and download PDF
-                    pdf_file = generate_pdf(onboarding_plan)
-                    with open(pdf_file, "rb") as file:
-                        st.download_button(
-                            label="📥 Download PDF",
-                            data=file,
-                            file_name="onboarding_plan.pdf",
-                            mime="application/pdf",
-                        )
+                    # Save employee data
+                    save_employee_data(employee_data)
+                    st.success("Employee details saved.")
+
+                    # Download PDF
+                    pdf_bytes = plan_pdf.output()
+                    st.download_button(
+                        label="📥 Download PDF",
+                        data=pdf_bytes,
+                        file_name="onboarding_plan.pdf",
+                        mime="application/pdf",
+                    )
                 else:
                     st.error("Onboarding plan generation failed due to recitation issues or an error. Please adjust the inputs.")
             else:
                 st.warning("Please provide required details for the onboarding plan (Name, Role, Department, Start Date, Previous Experience, and Goals).")
 
-        # Display saved employee data
-        if os.path.exists("onboarding_data.xlsx"):
-            st.subheader("📊 Saved Employee Data")
-            df = pd.read_excel("onboarding_data.xlsx")
-            st.dataframe(df)
+        # Bulk onboarding for a cohort of new hires
+        st.subheader("📤 Bulk Onboarding")
+        st.markdown(f"Upload a CSV with the columns: {', '.join(BATCH_COLUMNS)}.")
+        batch_file = st.file_uploader("Bulk upload CSV", type="csv", key="onboard_batch_csv")
+
+        if st.button("Generate Onboarding Plans", key="btn_generate_batch"):
+            if batch_file is not None:
+                import pandas as pd
+
+                try:
+                    batch_df = pd.read_csv(batch_file, dtype=str).fillna("")
+                except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                    st.error(f"Could not read the CSV: {e}")
+                else:
+                    missing_columns = [column for column in BATCH_COLUMNS if column not in batch_df.columns]
+                    if missing_columns:
+                        st.error(f"The CSV is missing the columns: {', '.join(missing_columns)}.")
+                    elif batch_df.empty:
+                        st.warning("The CSV has no rows.")
+                    else:
+                        records = batch_df[list(BATCH_COLUMNS)].to_dict("records")
+                        employees = [record for record in records if all(value.strip() for value in record.values())]
+                        if len(employees) < len(records):
+                            st.warning(f"Skipped {len(records) - len(employees)} rows with missing details.")
+                        if employees:
+                            onboard_mate_agent = get_agent(api_key)
+                            with st.spinner(f"Generating {len(employees)} onboarding plans..."):
+                                plans = asyncio.run(onboard_mate_agent.generate_batch(employees))
+
+                            generated = [employee_data for employee_data, plan in zip(employees, plans) if plan]
+                            failed = [employee_data["name"] for employee_data, plan in zip(employees, plans) if not plan]
+                            if generated:
+                                save_employee_records(generated)
+                                st.success(f"Generated {len(generated)} onboarding plans and saved the employee details.")
+                                st.download_button(
+                                    label="📥 Download PDFs",
+                                    data=build_plans_zip(employees, plans),
+                                    file_name="onboarding_plans.zip",
+                                    mime="application/zip",
+                                )
+                            if failed:
+                                st.error(f"Onboarding plan generation failed for: {', '.join(failed)}.")
+            else:
+                st.warning("Please upload a CSV file with the new hires' details.")
+
+        # Display saved employee data only when asked for, so submissions don't also read it back
+        st.subheader("📊 Saved Employee Data")
+        if st.toggle("Show saved employee data", key="toggle_saved_data"):
+            _migrate_legacy_excel_once()
+            saved_mtime = _saved_mtime()
+            if saved_mtime is not None:
+                df = _load_saved(DATA_PATH, saved_mtime)
+                st.dataframe(df)
+
+                # Only build the workbook when it is asked for
+                if st.button("Export to Excel", key="btn_export_excel"):
+                    st.download_button(
+                        label="📥 Download Excel",
+                        data=export_excel(df),
+                        file_name="onboarding_data.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    )
+            else:
+                st.info("No employee data has been saved yet.")
 
     with tab2:
         st.subheader("📚 Knowledge Assistance")
@@ -193,55 +386,33 @@ def main():
 
         # Example questions
         st.markdown("### Example Questions")
-        example_questions = [
-            "Where can I find the project documentation?",
-            "What is the process for requesting time off?",
-            "How do I set up my email account?",
-            "Where can I find the employee handbook?",
-            "What are the core working hours?",
-            "How do I access the company's intranet?",
-        ]
-        for question in example_questions:
-            st.markdown(f"- {question}")
+        st.markdown(EXAMPLE_QUESTIONS_MD)
 
         # Input field for knowledge query
         query = st.text_area("Enter your query", placeholder="e.g. Where can I find the project documentation?", key="knowledge_query")
 
         if st.button("Get Assistance", key="btn_get_assistance"):
             if query.strip():
-                with st.spinner("Fetching knowledge assistance..."):
-                    knowledge_response = onboard_mate_agent.provide_knowledge_assistance(query)
+                onboard_mate_agent = get_agent(api_key)
                 st.markdown("### Knowledge Assistance")
-                st.markdown(knowledge_response, unsafe_allow_html=True)
+                query_norm = normalize_query(query)
+                with st.spinner("Fetching knowledge assistance..."):
+                    cached_answer = find_cached_answer(onboard_mate_agent, query_norm)
+                    if cached_answer:
+                        st.markdown(cached_answer, unsafe_allow_html=True)
+                    else:
+                        try:
+                            knowledge_response = st.write_stream(onboard_mate_agent.provide_knowledge_assistance(query))
+                        except PlanGenerationError:
+                            st.error("Knowledge assistance failed due to recitation issues or an error. Please rephrase the query.")
+                        else:
+                            remember_answer(query_norm, knowledge_response)
             else:
                 st.warning("Please enter a query to get assistance.")
 
         # General FAQs
         st.markdown("### General FAQs")
-        faqs = {
-            "How do I set up my email account?": "You can set up your email account by following the instructions provided in the onboarding email. If you need further assistance, contact IT support.",
-            "What is the process for requesting time off?": "You can request time off by submitting a request through the HR portal. Make sure to get approval from your manager.",
-            "Where can I find the employee handbook?": "The employee handbook is available on the company's intranet under the 'Resources' section.",
-            "What are the core working hours?": "The core working hours are from 9 AM to 5 PM, Monday to Friday.",
-            "How do I access the company's intranet?": "You can access the intranet by logging in with your company credentials at intranet.company.com.",
-            "What is the dress code policy?": "The company follows a business casual dress code. Please refer to the employee handbook for more details.",
-            "How do I request IT support?": "You can request IT support by submitting a ticket through the IT support portal or by calling the IT helpdesk.",
-            "What are the key contacts in my department?": "You can find the key contacts in your department by checking the department directory on the intranet.",
-            "How do I enroll in benefits?": "You can enroll in benefits by logging into the HR portal and following the enrollment instructions.",
-            "What is the process for submitting expenses?": "You can submit expenses by filling out the expense report form available on the HR portal and submitting it for approval.",
-            "How do I access training materials?": "Training materials are available on the company's learning management system (LMS). You can access it through the intranet.",
-            "What is the company's policy on remote work?": "The company allows remote work for certain roles. Please check with your manager and refer to the remote work policy in the employee handbook.",
-            "How do I schedule a meeting room?": "You can schedule a meeting room by using the room booking system available on the intranet.",
-            "What are the company's core values?": "The company's core values are integrity, innovation, collaboration, and excellence.",
-            "How do I report a technical issue?": "You can report a technical issue by submitting a ticket through the IT support portal or by contacting the IT helpdesk.",
-            "What is the process for performance reviews?": "Performance reviews are conducted bi-annually. You will receive a notification from HR with instructions on how to prepare.",
-            "How do I update my personal information in the system?": "You can update your personal information by logging into the HR portal and navigating to the 'My Profile' section.",
-            "What are the company's social media guidelines?": "The company's social media guidelines are available in the employee handbook. Please review them before posting on social media.",
-            "How do I request business cards?": "You can request business cards by submitting a request through the HR portal. Make sure to include your design preferences.",
-        }
-        for question, answer in faqs.items():
-            with st.expander(question):
-                st.markdown(answer)
+        st.markdown(FAQS_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file